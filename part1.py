@@ -1,6 +1,12 @@
 import asyncio
+import atexit
+import functools
+import logging
 import os
-from typing import ClassVar
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from queue import Queue
+from typing import ClassVar, cast
 
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
@@ -9,10 +15,14 @@ from semantic_kernel.connectors.ai.chat_completion_client_base import (
     ChatCompletionClientBase,
 )
 from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion
+from semantic_kernel.connectors.ai.prompt_execution_settings import (
+    PromptExecutionSettings,
+)
 from semantic_kernel.contents import ChatHistory
 from semantic_kernel.functions import kernel_function
 from semantic_kernel.processes import ProcessBuilder
 from semantic_kernel.processes.kernel_process import (
+    KernelProcess,
     KernelProcessEvent,
     KernelProcessStep,
     KernelProcessStepContext,
@@ -20,7 +30,28 @@ from semantic_kernel.processes.kernel_process import (
 )
 from semantic_kernel.processes.local_runtime.local_kernel_process import start
 
-load_dotenv()
+# All steps, here and in part2.py, log through this logger
+logger = logging.getLogger("sk_process")
+
+
+@functools.cache
+def start_logging() -> None:
+    """Send the steps' log through a queue, so a step never blocks on writing to stdout while other process
+    runs are waiting on it, and a single background listener writes every line in order.
+
+    Called by build_pipeline(), so importing the module doesn't start a thread or register an exit hook.
+    """
+    logger.setLevel(logging.INFO)
+    # The listener already writes every record, handing them to the root logger as well would print them twice
+    logger.propagate = False
+    log_queue: Queue = Queue(-1)
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    listener = QueueListener(log_queue, handler)
+    listener.start()
+    atexit.register(listener.stop)
+    logger.addHandler(QueueHandler(log_queue))
+
 
 # Part 1.1 Define the process steps
 
@@ -29,8 +60,10 @@ load_dotenv()
 class GatherProductInfoStep(KernelProcessStep):
     @kernel_function
     def gather_product_information(self, product_name: str) -> str:
-        print(
-            f"{GatherProductInfoStep.__name__}\n\t Gathering product information for Product Name: {product_name}"
+        logger.info(
+            "%s\n\t Gathering product information for Product Name: %s",
+            GatherProductInfoStep.__name__,
+            product_name,
         )
 
         return """
@@ -89,16 +122,18 @@ sounds amazing.
     async def generate_documentation(
         self, context: KernelProcessStepContext, product_info: str, kernel: Kernel
     ) -> None:
-        print(
-            f"{GenerateDocumentationStep.__name__}\n\t Generating documentation for provided product_info..."
+        logger.info(
+            "%s\n\t Generating documentation for provided product_info...",
+            GenerateDocumentationStep.__name__,
         )
 
         self.state.chat_history.add_user_message(
             f"Product Information:\n{product_info}"
         )
 
-        chat_service, settings = kernel.select_ai_service(type=ChatCompletionClientBase)
-        assert isinstance(chat_service, ChatCompletionClientBase)  # nosec
+        chat_service, settings_template = _chat_service()
+        # The service writes the request messages into the settings, so work on a copy
+        settings = settings_template.model_copy()
 
         response = await chat_service.get_chat_message_content(
             chat_history=self.state.chat_history, settings=settings
@@ -113,50 +148,71 @@ sounds amazing.
 class PublishDocumentationStep(KernelProcessStep):
     @kernel_function
     async def publish_documentation(self, docs: str) -> None:
-        print(
-            f"{PublishDocumentationStep.__name__}\n\t Publishing product documentation:\n\n{docs}"
+        logger.info(
+            "%s\n\t Publishing product documentation:\n\n%s",
+            PublishDocumentationStep.__name__,
+            docs,
         )
 
 
 # Part 1.2 Define the process flow
+# Everything here runs on the first call to build_pipeline(), so importing this module (as part2.py and the
+# tests do) doesn't read the environment, create the AI service or start the log listener.
 
-# Create the process builder
-process_builder = ProcessBuilder(name="DocumentationGeneration")
 
-# Add the steps
-info_gathering_step = process_builder.add_step(GatherProductInfoStep)
-docs_generation_step = process_builder.add_step(GenerateDocumentationStep)
-docs_publish_step = process_builder.add_step(PublishDocumentationStep)
+@functools.cache
+def build_pipeline() -> tuple[Kernel, KernelProcess]:
+    load_dotenv()
+    start_logging()
 
-# Orchestrate the events
-process_builder.on_input_event("Start").send_event_to(target=info_gathering_step)
+    # Create the process builder
+    process_builder = ProcessBuilder(name="DocumentationGeneration")
 
-info_gathering_step.on_function_result("gather_product_information").send_event_to(
-    target=docs_generation_step,
-    function_name="generate_documentation",
-    parameter_name="product_info",
-)
+    # Add the steps
+    info_gathering_step = process_builder.add_step(GatherProductInfoStep)
+    docs_generation_step = process_builder.add_step(GenerateDocumentationStep)
+    docs_publish_step = process_builder.add_step(PublishDocumentationStep)
 
-docs_generation_step.on_event("documentation_generated").send_event_to(
-    target=docs_publish_step
-)
+    # Orchestrate the events
+    process_builder.on_input_event("Start").send_event_to(target=info_gathering_step)
 
-# Configure the kernel with an AI Service and connection details, if necessary
-kernel = Kernel()
-kernel.add_service(
-    AzureChatCompletion(
-        deployment_name=os.getenv("DEPLOYMENT_NAME"),
-        api_key=os.getenv("API_KEY"),
-        endpoint=os.getenv("ENDPOINT"),
-        service_id=os.getenv("DEPLOYMENT_NAME"),
+    info_gathering_step.on_function_result("gather_product_information").send_event_to(
+        target=docs_generation_step,
+        function_name="generate_documentation",
+        parameter_name="product_info",
     )
-)
 
-# Build the process
-kernel_process = process_builder.build()
+    docs_generation_step.on_event("documentation_generated").send_event_to(
+        target=docs_publish_step
+    )
+
+    # Configure the kernel with an AI Service and connection details, if necessary
+    kernel = Kernel()
+    kernel.add_service(
+        AzureChatCompletion(
+            deployment_name=os.getenv("DEPLOYMENT_NAME"),
+            api_key=os.getenv("API_KEY"),
+            endpoint=os.getenv("ENDPOINT"),
+            service_id=os.getenv("DEPLOYMENT_NAME"),
+        )
+    )
+
+    # Build the process
+    return kernel, process_builder.build()
+
+
+@functools.cache
+def _chat_service() -> tuple[ChatCompletionClientBase, PromptExecutionSettings]:
+    """Select the chat service once and check its type here, instead of on every step invocation."""
+    kernel, _ = build_pipeline()
+    chat_service, settings = kernel.select_ai_service(type=ChatCompletionClientBase)
+    assert isinstance(chat_service, ChatCompletionClientBase)  # nosec
+    return cast(ChatCompletionClientBase, chat_service), settings
 
 
 async def main():
+    kernel, kernel_process = build_pipeline()
+
     # Start the process
     async with await start(
         process=kernel_process,
@@ -6,10 +6,19 @@
 #
 
 import asyncio
+import contextlib
+import functools
+import hashlib
 import os
-from typing import ClassVar
+import re
+from collections import OrderedDict
+from collections.abc import Iterable
+from contextvars import ContextVar
+from typing import Any, ClassVar, Final, cast
 
+import orjson
 from dotenv import load_dotenv
+from jsonschema import Draft7Validator, ValidationError
 from pydantic import BaseModel, Field
 from semantic_kernel import Kernel
 from semantic_kernel.connectors.ai.chat_completion_client_base import (
@@ -19,23 +28,30 @@ from semantic_kernel.connectors.ai.open_ai import (
     AzureChatCompletion,
     OpenAIChatPromptExecutionSettings,
 )
-from semantic_kernel.contents import ChatHistory
+from semantic_kernel.connectors.utils.structured_output_schema import (
+    generate_structured_output_response_format_schema,
+)
+from semantic_kernel.contents import AuthorRole, ChatHistory, ChatMessageContent
+from semantic_kernel.contents.utils.finish_reason import FinishReason
 from semantic_kernel.functions import kernel_function
 from semantic_kernel.processes import ProcessBuilder
 from semantic_kernel.processes.kernel_process import (
+    KernelProcess,
     KernelProcessEvent,
     KernelProcessStep,
     KernelProcessStepContext,
 )
 from semantic_kernel.processes.local_runtime.local_kernel_process import start
+from semantic_kernel.schema.kernel_json_schema_builder import KernelJsonSchemaBuilder
 
 # --- PART 2.1: Import and extend process steps from part1.py ---
-# Import the original process steps and state from part1.py
+# Import the original process steps and state, and the logger they share, from part1.py
 from part1 import (
     GatherProductInfoStep,
     GeneratedDocumentationState,
     KernelProcessStepState,
-    PublishDocumentationStep,
+    logger,
+    start_logging,
 )
 
 # --- PART 2.2: Add a Proofreading Step ---
@@ -57,6 +73,106 @@ class ProofreadingResponse(BaseModel):
     )
 
 
+# Built once and reused for every proofreading pass of the review cycle. The model above only provides the
+# schema for structured output, responses are handled as plain dicts checked against that schema.
+# The response_format is serialized here as well, so the service passes it through as is on every request
+# instead of converting the model class each time.
+_PROOFREAD_SCHEMA = KernelJsonSchemaBuilder.build(
+    parameter_type=ProofreadingResponse, structured_output=True
+)
+_PROOFREAD_RESPONSE_FORMAT: Final = generate_structured_output_response_format_schema(
+    name=ProofreadingResponse.__name__, schema=_PROOFREAD_SCHEMA
+)
+_PROOFREAD_VALIDATOR = Draft7Validator(_PROOFREAD_SCHEMA)
+
+_PROOFREAD_SYSTEM_PROMPT: Final[str] = """
+Your job is to proofread customer facing documentation for a new product from Contoso. You will be provided with 
+proposed documentation for a product and you must do the following things:
+
+1. Determine if the documentation passes the following criteria:
+    1. Documentation must use a professional tone.
+    1. Documentation should be free of spelling or grammar mistakes.
+    1. Documentation should be free of any offensive or inappropriate language.
+    1. Documentation should be technically accurate.
+2. If the documentation does not pass 1, you must write detailed feedback of the changes that are needed to 
+    improve the documentation. 
+"""
+
+# Cap the verdict's length, and sample deterministically so identical docs get the same verdict. The cap leaves
+# room for a rejection's detailed explanation and suggestions; a response that still hits it is detected below.
+# Generation keeps the service defaults, the documentation itself is the output there.
+_PROOFREAD_SAMPLING = {"max_tokens": 2000, "temperature": 0.0, "top_p": 1.0}
+
+# Every proofreading call starts from this history; calls copy it and add the docs as the user message.
+# The copies share the one system message object, so the prompt is identical by identity on every request.
+_PROOFREAD_SYSTEM_MESSAGE: Final = ChatMessageContent(
+    role=AuthorRole.SYSTEM, content=_PROOFREAD_SYSTEM_PROMPT
+)
+_PROOFREAD_HISTORY_TEMPLATE = ChatHistory(messages=[_PROOFREAD_SYSTEM_MESSAGE])
+
+
+class _SuggestionLines:
+    """Renders suggestions as indented lines in a single pass, and only if the log record is emitted."""
+
+    __slots__ = ("suggestions",)
+
+    def __init__(self, suggestions: list[str]):
+        self.suggestions = suggestions
+
+    def __str__(self) -> str:
+        return "".join(f"\n\t\t{suggestion}" for suggestion in self.suggestions)
+
+
+# Stands in for a proofreading response that can't be parsed or doesn't match the schema. Unchecked docs are
+# never approved; they go through another rewrite instead, which the bound on the review cycle limits.
+_UNREADABLE_VERDICT: Final[dict[str, Any]] = {
+    "meets_expectations": False,
+    "explanation": "The proofreading response could not be read.",
+    "suggestions": [],
+}
+
+# Digests of the documentation the proofreader approved, least recently used first. Rejections aren't kept,
+# rejected docs are rewritten and never proofread again as they are.
+_APPROVED_CACHE: OrderedDict[str, None] = OrderedDict()
+_APPROVED_CACHE_SIZE = 256
+
+# Cheap local checks that catch obviously unfit drafts without an LLM call
+_MIN_DOCS_LENGTH = 200
+_PROFANITY_PATTERN = re.compile(r"\b(damn|shit|fuck|crap|bastard)\b", re.IGNORECASE)
+
+
+def _prefilter(docs: str) -> dict[str, Any] | None:
+    """Reject docs that fail the local checks, return None if the proofreader has to decide."""
+    if len(docs) <= _MIN_DOCS_LENGTH:
+        return {
+            "meets_expectations": False,
+            "explanation": "The documentation is too short to be useful to customers.",
+            "suggestions": [
+                "Describe the product, its features and how to troubleshoot it."
+            ],
+        }
+    if match := _PROFANITY_PATTERN.search(docs):
+        return {
+            "meets_expectations": False,
+            "explanation": "The documentation contains inappropriate language.",
+            "suggestions": [f"Remove the word '{match.group(0)}'."],
+        }
+    return None
+
+
+@functools.cache
+def _proofread_settings() -> OpenAIChatPromptExecutionSettings:
+    """Settings template for proofreading, configured once.
+
+    Derived from the service's own settings, so it already has the service's settings class and the
+    service uses it as is instead of converting it on every call.
+    """
+    _, settings_template = _chat_service()
+    return settings_template.model_copy(
+        update={"response_format": _PROOFREAD_RESPONSE_FORMAT, **_PROOFREAD_SAMPLING}
+    )
+
+
 class ProofreadStep(KernelProcessStep):
     """A process step to proofread documentation before publishing (new in part2)."""
 
@@ -64,65 +180,156 @@ class ProofreadStep(KernelProcessStep):
     async def proofread_documentation(
         self, docs: str, context: KernelProcessStepContext, kernel: Kernel
     ) -> None:
-        print(f"{ProofreadStep.__name__}\n\t Proofreading product documentation...")
-
-        system_prompt = """
-        Your job is to proofread customer facing documentation for a new product from Contoso. You will be provided with 
-        proposed documentation for a product and you must do the following things:
-
-        1. Determine if the documentation passes the following criteria:
-            1. Documentation must use a professional tone.
-            1. Documentation should be free of spelling or grammar mistakes.
-            1. Documentation should be free of any offensive or inappropriate language.
-            1. Documentation should be technically accurate.
-        2. If the documentation does not pass 1, you must write detailed feedback of the changes that are needed to 
-            improve the documentation. 
-        """
+        logger.info(
+            "%s\n\t Proofreading product documentation...", ProofreadStep.__name__
+        )
+
+        # The proofreader has approved these exact docs before, no need to ask again
+        digest = hashlib.blake2b(docs.encode(), digest_size=16).hexdigest()
+        if digest in _APPROVED_CACHE:
+            _APPROVED_CACHE.move_to_end(digest)
+            logger.info("\n\tGrade: Pass (approved earlier)")
+            await context.emit_event(process_event="documentation_approved", data=docs)
+            return
+
+        formatted_response = _prefilter(docs)
+        if formatted_response is None:
+            formatted_response = await self._ask_proofreader(docs)
+            if formatted_response is None:
+                # Not a verdict on the docs, so it isn't cached
+                formatted_response = _UNREADABLE_VERDICT
+            elif formatted_response["meets_expectations"]:
+                _APPROVED_CACHE[digest] = None
+                if len(_APPROVED_CACHE) > _APPROVED_CACHE_SIZE:
+                    _APPROVED_CACHE.popitem(last=False)
+
+        logger.info(
+            "\n\tGrade: %s\n\tExplanation: %s\n\tSuggestions:%s",
+            "Pass" if formatted_response["meets_expectations"] else "Fail",
+            formatted_response["explanation"],
+            _SuggestionLines(formatted_response["suggestions"]),
+        )
 
-        chat_history = ChatHistory(system_message=system_prompt)
+        if formatted_response["meets_expectations"]:
+            await context.emit_event(process_event="documentation_approved", data=docs)
+        else:
+            # Send the feedback pre-serialized, so it doesn't need to be serialized again on every hop
+            await context.emit_event(
+                process_event="documentation_rejected",
+                data=orjson.dumps(
+                    {
+                        "explanation": formatted_response["explanation"],
+                        "suggestions": formatted_response["suggestions"],
+                    }
+                ),
+            )
+
+    async def _ask_proofreader(self, docs: str) -> dict[str, Any] | None:
+        """Have the LLM proofread the docs, return None if its response isn't a valid verdict."""
+        chat_history = _PROOFREAD_HISTORY_TEMPLATE.model_copy(
+            update={"messages": list(_PROOFREAD_HISTORY_TEMPLATE.messages)}
+        )
         chat_history.add_user_message(docs)
 
         # Use structured output to ensure the response format is easily parsable
-        chat_service, settings = kernel.select_ai_service(type=ChatCompletionClientBase)
-        assert isinstance(chat_service, ChatCompletionClientBase)  # nosec
-        assert isinstance(settings, OpenAIChatPromptExecutionSettings)  # nosec
-
-        settings.response_format = ProofreadingResponse
+        chat_service, _ = _chat_service()
+        # The service writes the request messages into the settings, so work on a copy of the cached template
+        settings = _proofread_settings().model_copy()
 
         response = await chat_service.get_chat_message_content(
             chat_history=chat_history, settings=settings
         )
 
-        formatted_response: ProofreadingResponse = (
-            ProofreadingResponse.model_validate_json(response.content)
-        )
-
-        suggestions_text = "\n\t\t".join(formatted_response.suggestions)
-        print(
-            f"\n\tGrade: {'Pass' if formatted_response.meets_expectations else 'Fail'}\n\t"
-            f"Explanation: {formatted_response.explanation}\n\t"
-            f"Suggestions: {suggestions_text}"
-        )
-
-        if formatted_response.meets_expectations:
-            await context.emit_event(process_event="documentation_approved", data=docs)
-        else:
-            await context.emit_event(
-                process_event="documentation_rejected",
-                data={
-                    "explanation": formatted_response.explanation,
-                    "suggestions": formatted_response.suggestions,
-                },
+        if response.finish_reason == FinishReason.LENGTH:
+            logger.warning(
+                "%s\n\t The proofreading response was cut off at %d tokens.",
+                ProofreadStep.__name__,
+                settings.max_tokens,
+            )
+            return None
+
+        try:
+            formatted_response = orjson.loads(response.content)
+            _PROOFREAD_VALIDATOR.validate(formatted_response)
+        except (orjson.JSONDecodeError, ValidationError) as exc:
+            logger.warning(
+                "%s\n\t Could not read the proofreading response: %s",
+                ProofreadStep.__name__,
+                exc,
             )
+            return None
+        return formatted_response
 
 
 # --- PART 2.3: Update GenerateDocumentationStep to support suggestions ---
 # This class is extended from part1.py to add a new kernel_function for applying suggestions.
 
+# Generated documentation, keyed by a digest of the conversation sent to the model. Reruns over the same
+# product reuse the earlier drafts, and concurrent identical requests share a single in-flight call.
+_GENERATION_CACHE: OrderedDict[str, asyncio.Future[ChatMessageContent]] = OrderedDict()
+_GENERATION_CACHE_SIZE = 256
+
+
+async def _generate(chat_history: ChatHistory) -> ChatMessageContent:
+    """Generate the next draft for the conversation, or reuse the draft of an identical earlier one."""
+    digest = hashlib.blake2b(digest_size=16)
+    for message in chat_history.messages:
+        digest.update(f"{message.role}\0{message.content}\0".encode())
+    key = digest.hexdigest()
+
+    if (future := _GENERATION_CACHE.get(key)) is not None:
+        _GENERATION_CACHE.move_to_end(key)
+        return await asyncio.shield(future)
+
+    future = asyncio.get_running_loop().create_future()
+    _GENERATION_CACHE[key] = future
+    if len(_GENERATION_CACHE) > _GENERATION_CACHE_SIZE:
+        _GENERATION_CACHE.popitem(last=False)
+
+    chat_service, settings_template = _chat_service()
+    settings = settings_template.model_copy()
+    try:
+        # The chat completions API takes a single conversation per request, so there is no multi-prompt
+        # request to batch into; concurrent processes simply issue concurrent requests over the shared client.
+        response = await chat_service.get_chat_message_content(
+            chat_history=chat_history, settings=settings
+        )
+    except BaseException as exc:
+        # Don't cache failures, the next identical request tries again
+        _GENERATION_CACHE.pop(key, None)
+        if isinstance(exc, Exception):
+            future.set_exception(exc)
+            future.exception()  # waiters re-raise it, don't warn about it being unretrieved
+        else:
+            future.cancel()
+        raise
+    future.set_result(response)
+    return response
 
-class GenerateDocumentationStep(KernelProcessStep[GeneratedDocumentationState]):
-    state: GeneratedDocumentationState = Field(
-        default_factory=GeneratedDocumentationState
+
+# A draft that is still rejected after this many rewrites is not rewritten again
+_MAX_CYCLES_PER_DOC = 3
+
+# Limits how many rewrites the runs of one run_many call do at once, if the caller asked for a limit. run_many
+# sets it in each run's task, and the steps of that run inherit it through the tasks the runtime starts.
+_REWRITE_SEMAPHORE: ContextVar[asyncio.Semaphore | None] = ContextVar(
+    "_REWRITE_SEMAPHORE", default=None
+)
+
+
+# Stands in for the turns _trim_history drops from the history
+_OMITTED_NOTE = "Earlier turns of this conversation were omitted; the latest draft and the request for it follow."
+
+
+class ReviewedDocumentationState(GeneratedDocumentationState):
+    """State for the GenerateDocumentationStep, extended with the number of rewrites so far."""
+
+    cycle_count: int = 0
+
+
+class GenerateDocumentationStep(KernelProcessStep[ReviewedDocumentationState]):
+    state: ReviewedDocumentationState = Field(
+        default_factory=ReviewedDocumentationState
     )
 
     system_prompt: ClassVar[
@@ -135,32 +342,71 @@ documentation you create, take the suggestions into account and rewrite the docu
 sounds amazing.
 """
 
-    async def activate(
-        self, state: KernelProcessStepState[GeneratedDocumentationState]
-    ):
+    # Bounds on the history re-sent on every rewrite of the review cycle
+    max_turns: ClassVar[int] = 4
+    max_chars: ClassVar[int] = 16_000
+
+    async def activate(self, state: KernelProcessStepState[ReviewedDocumentationState]):
         self.state = state.state
         if self.state.chat_history is None:
             self.state.chat_history = ChatHistory(system_message=self.system_prompt)
         self.state.chat_history
 
+    def _trim_history(self) -> None:
+        """Keep the system prompt, the product information, the latest draft and the new request.
+
+        Only the turns before the latest draft are dropped, oldest first, and a note says they were omitted.
+        """
+        messages = self.state.chat_history.messages
+        pinned, turns = messages[:2], messages[2:]
+
+        # The draft being rewritten and the request for it are always sent as they are
+        if len(turns) >= 2 and turns[-2].role == AuthorRole.ASSISTANT:
+            latest = turns[-2:]
+        else:
+            latest = turns[-1:]
+        older = [
+            message
+            for message in turns[: len(turns) - len(latest)]
+            if message.content != _OMITTED_NOTE
+        ]
+        omitted = len(older) < len(turns) - len(latest)
+
+        kept = older[max(0, len(older) - 2 * (self.max_turns - 1)) :]
+        budget = self.max_chars - sum(len(m.content) for m in pinned + latest)
+        while kept and sum(len(m.content) for m in kept) > budget:
+            kept = kept[1:]
+
+        if omitted or len(kept) < len(older):
+            note = ChatMessageContent(role=AuthorRole.USER, content=_OMITTED_NOTE)
+            self.state.chat_history.messages = [*pinned, note, *kept, *latest]
+
+    def _drop_previous_drafts(self) -> None:
+        """Remove all but the latest assistant draft, a rewrite only needs the current one."""
+        messages = self.state.chat_history.messages
+        drafts = [i for i, m in enumerate(messages) if m.role == AuthorRole.ASSISTANT]
+        stale = set(drafts[:-1])
+        self.state.chat_history.messages = [
+            m for i, m in enumerate(messages) if i not in stale
+        ]
+
     @kernel_function
     async def generate_documentation(
         self, context: KernelProcessStepContext, product_info: str, kernel: Kernel
     ) -> None:
-        print(
-            f"{GenerateDocumentationStep.__name__}\n\t Generating documentation for provided product_info..."
+        logger.info(
+            "%s\n\t Generating documentation for provided product_info...",
+            GenerateDocumentationStep.__name__,
         )
 
         self.state.chat_history.add_user_message(
             f"Product Information:\n{product_info}"
         )
+        self._trim_history()
 
-        chat_service, settings = kernel.select_ai_service(type=ChatCompletionClientBase)
-        assert isinstance(chat_service, ChatCompletionClientBase)  # nosec
-
-        response = await chat_service.get_chat_message_content(
-            chat_history=self.state.chat_history, settings=settings
-        )
+        response = await _generate(self.state.chat_history)
+        # Keep the draft in the history so a later rewrite knows what to rewrite
+        self.state.chat_history.add_message(response)
 
         await context.emit_event(
             process_event="documentation_generated", data=str(response)
@@ -168,22 +414,35 @@ sounds amazing.
 
     @kernel_function
     async def apply_suggestions(
-        self, suggestions: str, context: KernelProcessStepContext, kernel: Kernel
+        self, suggestions: bytes, context: KernelProcessStepContext, kernel: Kernel
     ) -> None:
-        print(
-            f"{GenerateDocumentationStep.__name__}\n\t Rewriting documentation with provided suggestions..."
+        logger.info(
+            "%s\n\t Rewriting documentation with provided suggestions...",
+            GenerateDocumentationStep.__name__,
         )
 
-        self.state.chat_history.add_user_message(
-            f"Rewrite the documentation with the following suggestions:\n\n{suggestions}"
-        )
+        self.state.cycle_count += 1
+        if self.state.cycle_count > _MAX_CYCLES_PER_DOC:
+            # Emitting nothing ends the cycle, re-sending the same draft would only be rejected again.
+            # Nothing is published, which run_many reports as a DocumentationRun without docs.
+            logger.warning(
+                "%s\n\t Still rejected after %d rewrites, giving up on this documentation.",
+                GenerateDocumentationStep.__name__,
+                _MAX_CYCLES_PER_DOC,
+            )
+            return
 
-        chat_service, settings = kernel.select_ai_service(type=ChatCompletionClientBase)
-        assert isinstance(chat_service, ChatCompletionClientBase)  # nosec
+        feedback = orjson.loads(suggestions)
 
-        generated_documentation_response = await chat_service.get_chat_message_content(
-            chat_history=self.state.chat_history, settings=settings
-        )
+        async with _REWRITE_SEMAPHORE.get() or contextlib.nullcontext():
+            self._drop_previous_drafts()
+            self.state.chat_history.add_user_message(
+                f"Rewrite the documentation with the following suggestions:\n\n{feedback}"
+            )
+            self._trim_history()
+
+            generated_documentation_response = await _generate(self.state.chat_history)
+            self.state.chat_history.add_message(generated_documentation_response)
 
         await context.emit_event(
             process_event="documentation_generated",
@@ -191,71 +450,221 @@ sounds amazing.
         )
 
 
+# The publishing step is extended too, it records how the run ended so run_many can report it: the docs it
+# published, or the error a step failed with
+
+
+class PublishedDocumentationState(BaseModel):
+    """State for the PublishDocumentationStep, the published docs or the error that ended the run."""
+
+    docs: str | None = None
+    error: str | None = None
+
+
+class PublishDocumentationStep(KernelProcessStep[PublishedDocumentationState]):
+    state: PublishedDocumentationState = Field(
+        default_factory=PublishedDocumentationState
+    )
+
+    async def activate(
+        self, state: KernelProcessStepState[PublishedDocumentationState]
+    ):
+        self.state = state.state
+
+    @kernel_function
+    async def publish_documentation(self, docs: str) -> None:
+        logger.info(
+            "%s\n\t Publishing product documentation:\n\n%s",
+            PublishDocumentationStep.__name__,
+            docs,
+        )
+        self.state.docs = docs
+
+    @kernel_function
+    async def record_error(self, error: str) -> None:
+        logger.error(
+            "%s\n\t Not publishing, a step failed: %s",
+            PublishDocumentationStep.__name__,
+            error,
+        )
+        self.state.error = error
+
+
 # --- PART 2.4: Update the process flow to include the new proofreading step and cycle ---
 # This section shows the new event routing, which now includes the proofreader and a feedback loop if the docs are rejected.
 
-load_dotenv()
+# Everything here runs on the first call to build_pipeline(), so importing this module (e.g. from the tests)
+# doesn't read the environment or create the AI service. The built process is cached in memory, not on disk:
+# building takes well under a millisecond next to the seconds spent importing semantic_kernel, and the
+# KernelProcess can't be pickled anyway (its step states are parametrized generic classes).
 
-# Create the process builder (same as part1, but with new steps added)
-process_builder = ProcessBuilder(name="DocumentationGeneration")
 
-# Add the steps (proofreader is new)
-info_gathering_step = process_builder.add_step(GatherProductInfoStep)
-docs_generation_step = process_builder.add_step(GenerateDocumentationStep)
-docs_proofread_step = process_builder.add_step(ProofreadStep)  # New step
-docs_publish_step = process_builder.add_step(PublishDocumentationStep)
+@functools.cache
+def build_pipeline() -> tuple[Kernel, KernelProcess]:
+    load_dotenv()
+    start_logging()
 
-# Orchestrate the events (note the new cycle for rejected docs)
-process_builder.on_input_event("Start").send_event_to(target=info_gathering_step)
+    # Create the process builder (same as part1, but with new steps added)
+    process_builder = ProcessBuilder(name="DocumentationGeneration")
 
-info_gathering_step.on_function_result("gather_product_information").send_event_to(
-    target=docs_generation_step,
-    function_name="generate_documentation",
-    parameter_name="product_info",
-)
+    # Add the steps (proofreader is new)
+    info_gathering_step = process_builder.add_step(GatherProductInfoStep)
+    docs_generation_step = process_builder.add_step(GenerateDocumentationStep)
+    docs_proofread_step = process_builder.add_step(ProofreadStep)  # New step
+    docs_publish_step = process_builder.add_step(PublishDocumentationStep)
 
-docs_generation_step.on_event("documentation_generated").send_event_to(
-    target=docs_proofread_step, parameter_name="docs"
-)
+    # Orchestrate the events (note the new cycle for rejected docs)
+    process_builder.on_input_event("Start").send_event_to(target=info_gathering_step)
 
-docs_proofread_step.on_event("documentation_rejected").send_event_to(
-    target=docs_generation_step,
-    function_name="apply_suggestions",
-    parameter_name="suggestions",
-)
+    info_gathering_step.on_function_result("gather_product_information").send_event_to(
+        target=docs_generation_step,
+        function_name="generate_documentation",
+        parameter_name="product_info",
+    )
 
-docs_proofread_step.on_event("documentation_approved").send_event_to(
-    target=docs_publish_step
-)
+    docs_generation_step.on_event("documentation_generated").send_event_to(
+        target=docs_proofread_step, parameter_name="docs"
+    )
 
-# Configure the kernel with an AI Service and connection details, if necessary (same as part1)
-kernel = Kernel()
-kernel.add_service(
-    AzureChatCompletion(
-        deployment_name=os.getenv("DEPLOYMENT_NAME"),
-        api_key=os.getenv("API_KEY"),
-        endpoint=os.getenv("ENDPOINT"),
-        service_id=os.getenv("DEPLOYMENT_NAME"),
+    docs_proofread_step.on_event("documentation_rejected").send_event_to(
+        target=docs_generation_step,
+        function_name="apply_suggestions",
+        parameter_name="suggestions",
     )
-)
 
-# Build the process
-kernel_process = process_builder.build()
+    docs_proofread_step.on_event("documentation_approved").send_event_to(
+        target=docs_publish_step, function_name="publish_documentation"
+    )
 
-# --- PART 2.5: Run the process (same as part1, but now with the extended flow) ---
+    # A step function that raises emits "<function>.OnError" instead of its events, and the run would end
+    # silently. Route those to the publishing step as well, so the run's outcome records the failure.
+    for step, function_name in (
+        (info_gathering_step, "gather_product_information"),
+        (docs_generation_step, "generate_documentation"),
+        (docs_generation_step, "apply_suggestions"),
+        (docs_proofread_step, "proofread_documentation"),
+    ):
+        step.on_event(f"{function_name}.OnError").send_event_to(
+            target=docs_publish_step,
+            function_name="record_error",
+            parameter_name="error",
+        )
+
+    # Configure the kernel with an AI Service and connection details, if necessary (same as part1)
+    kernel = Kernel()
+    kernel.add_service(
+        AzureChatCompletion(
+            deployment_name=os.getenv("DEPLOYMENT_NAME"),
+            api_key=os.getenv("API_KEY"),
+            endpoint=os.getenv("ENDPOINT"),
+            service_id=os.getenv("DEPLOYMENT_NAME"),
+        )
+    )
 
+    # Build the process
+    return kernel, process_builder.build()
+
+
+@functools.cache
+def _chat_service() -> (
+    tuple[ChatCompletionClientBase, OpenAIChatPromptExecutionSettings]
+):
+    """Select the chat service and its default settings once, the steps reuse them on every call.
+
+    Their types are checked here, once, instead of on every step invocation.
+    """
+    kernel, _ = build_pipeline()
+    chat_service, settings = kernel.select_ai_service(type=ChatCompletionClientBase)
+    assert isinstance(chat_service, ChatCompletionClientBase)  # nosec
+    assert isinstance(settings, OpenAIChatPromptExecutionSettings)  # nosec
+    return (
+        cast(ChatCompletionClientBase, chat_service),
+        cast(OpenAIChatPromptExecutionSettings, settings),
+    )
+
+
+# --- PART 2.5: Run the process (same as part1, but now with the extended flow) ---
+# Each product gets its own process instance. The runs are started concurrently so the LLM calls of
+# different products overlap instead of queueing behind each other; the semaphore caps how many runs
+# are in flight at once to stay within the deployment's rate limits.
+
+MAX_CONCURRENCY = 4
+
+
+class DocumentationRun(BaseModel):
+    """Outcome of one product's process run.
+
+    `docs` holds the published docs and `error` the message of the error the run failed with. Neither is
+    set if the review cycle gave up on the docs.
+    """
+
+    product: str
+    docs: str | None = None
+    error: str | None = None
+
+    @property
+    def published(self) -> bool:
+        return self.docs is not None
+
+
+def _outcome(process_state: KernelProcess) -> PublishedDocumentationState:
+    """The publishing step's record of how the process ended."""
+    for step in process_state.steps:
+        if isinstance(step.state.state, PublishedDocumentationState):
+            return step.state.state
+    return PublishedDocumentationState()
+
+
+async def run_many(
+    products: Iterable[str],
+    max_concurrency: int = MAX_CONCURRENCY,
+    max_concurrent_rewrites: int | None = None,
+) -> list[DocumentationRun]:
+    """Run the documentation process for every product concurrently, and report each product's outcome.
+
+    At most `max_concurrency` runs are in flight at once. `max_concurrent_rewrites` additionally caps how
+    many of them rewrite rejected docs at the same time; by default only `max_concurrency` bounds them.
+    A failing run doesn't affect the others, its error message is returned in its DocumentationRun.
+    """
+    kernel, kernel_process = build_pipeline()
+    semaphore = asyncio.Semaphore(max_concurrency)
+    rewrite_semaphore = (
+        asyncio.Semaphore(max_concurrent_rewrites)
+        if max_concurrent_rewrites is not None
+        else None
+    )
 
-async def main():
-    # Start the process
-    async with await start(
-        process=kernel_process,
-        kernel=kernel,
-        initial_event=KernelProcessEvent(id="Start", data="Contoso GlowBrew"),
-    ) as process_context:
-        _ = await process_context.get_state()
+    async def run_one(product: str) -> DocumentationRun:
+        # Each run_one is its own task, so this only applies to the steps of this run
+        _REWRITE_SEMAPHORE.set(rewrite_semaphore)
+        async with semaphore:
+            try:
+                # Step state lives on the built process, so every run gets its own copy to keep the
+                # products' chat histories apart
+                async with await start(
+                    process=kernel_process.model_copy(deep=True),
+                    kernel=kernel,
+                    initial_event=KernelProcessEvent(id="Start", data=product),
+                ) as process_context:
+                    process_state = await process_context.get_state()
+            except Exception as exc:
+                logger.exception("Documentation run for %s failed", product)
+                return DocumentationRun(product=product, error=str(exc))
+        outcome = _outcome(process_state)
+        return DocumentationRun(product=product, docs=outcome.docs, error=outcome.error)
+
+    return await asyncio.gather(*(run_one(product) for product in products))
+
+
+async def main(products: Iterable[str] = ("Contoso GlowBrew",)):
+    # Start one process per product
+    runs = await run_many(products)
+    for run in runs:
+        if run.error is not None:
+            logger.warning("Documenting %s failed: %s", run.product, run.error)
+        elif not run.published:
+            logger.warning("No documentation was published for %s", run.product)
 
 
 if __name__ == "__main__":
-    import asyncio
-
     asyncio.run(main())
@@ -1,22 +1,262 @@
-import subprocess
-import sys
+import json
+import logging
+import os
 
+import pytest
+from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion
+from semantic_kernel.contents import AuthorRole, ChatMessageContent
+from semantic_kernel.contents.utils.finish_reason import FinishReason
 
-def test_part1_runs():
-    """Test that part1.py runs end-to-end without error."""
-    result = subprocess.run(
-        [sys.executable, "part1.py"], capture_output=True, text=True
-    )
-    print("STDOUT:\n", result.stdout)
-    print("STDERR:\n", result.stderr)
-    assert result.returncode == 0, f"part1.py failed with exit code {result.returncode}"
+# part1.py and part2.py configure the Azure service when their pipeline is first built. The chat calls
+# are faked below, so placeholder connection details are enough.
+os.environ.setdefault("DEPLOYMENT_NAME", "test-deployment")
+os.environ.setdefault("API_KEY", "test-key")
+os.environ.setdefault("ENDPOINT", "https://example.openai.azure.com")
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Start every test without drafts or verdicts cached by an earlier test."""
+    import part2
+
+    part2._APPROVED_CACHE.clear()
+    part2._GENERATION_CACHE.clear()
+
+
+@pytest.fixture(autouse=True)
+def step_log(caplog):
+    """Capture the steps' log. Their logger doesn't propagate, so caplog's handler is attached to it directly."""
+    logger = logging.getLogger("sk_process")
+    logger.addHandler(caplog.handler)
+    yield caplog
+    logger.removeHandler(caplog.handler)
+
+
+@pytest.fixture(autouse=True)
+def fake_chat_completion(monkeypatch):
+    """Replace the Azure chat calls with canned responses: the first proofread fails, the second passes.
 
+    Set "approve_after" on the returned dict to change how many proofreads fail first, "truncate" to cut
+    every proofreading response off halfway, or "fail" to make every call raise.
+    """
+    calls = {"proofread": 0, "generate": 0}
 
-def test_part2_runs():
-    """Test that part2.py runs end-to-end without error."""
-    result = subprocess.run(
-        [sys.executable, "part2.py"], capture_output=True, text=True
+    def respond(settings):
+        if calls.get("fail"):
+            raise RuntimeError("The deployment is unavailable.")
+        if getattr(settings, "response_format", None) is None:
+            calls["generate"] += 1
+            return (
+                f"GlowBrew documentation, draft {calls['generate']}. "
+                "GlowBrew is an AI driven coffee machine with programmable light shows, "
+                "a built in grinder and an AI taste assistant that learns your preferences. "
+                "If the LEDs malfunction, reset the lighting settings via the app."
+            )
+        calls["proofread"] += 1
+        approved = calls["proofread"] > calls.get("approve_after", 1)
+        verdict = json.dumps(
+            {
+                "meets_expectations": approved,
+                "explanation": "Looks good." if approved else "Too much hype.",
+                "suggestions": [] if approved else ["Tone down the hype."],
+            }
+        )
+        return verdict[: len(verdict) // 2] if calls.get("truncate") else verdict
+
+    async def get_chat_message_content(self, chat_history, settings, **kwargs):
+        content = respond(settings)
+        # A response cut off by max_tokens ends with a "length" finish reason
+        truncated = calls.get("truncate") and settings.response_format is not None
+        return ChatMessageContent(
+            role=AuthorRole.ASSISTANT,
+            content=content,
+            finish_reason=FinishReason.LENGTH if truncated else FinishReason.STOP,
+        )
+
+    monkeypatch.setattr(
+        AzureChatCompletion, "get_chat_message_content", get_chat_message_content
     )
-    print("STDOUT:\n", result.stdout)
-    print("STDERR:\n", result.stderr)
-    assert result.returncode == 0, f"part2.py failed with exit code {result.returncode}"
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_part1_runs(fake_chat_completion, step_log):
+    """Test that part1.py runs end-to-end without error."""
+    from part1 import main
+
+    await main()
+
+    assert "Publishing product documentation" in step_log.text
+    assert fake_chat_completion["generate"] == 1
+
+
+@pytest.mark.asyncio
+async def test_part2_runs(fake_chat_completion, step_log):
+    """Test that part2.py runs end-to-end, including one rejection and rewrite."""
+    from part2 import main
+
+    await main()
+
+    assert "Rewriting documentation with provided suggestions" in step_log.text
+    published = step_log.text.split("Publishing product documentation")[1]
+    assert "draft 2" in published
+    assert fake_chat_completion == {"proofread": 2, "generate": 2}
+
+
+@pytest.mark.asyncio
+async def test_part2_stops_rewriting_after_max_cycles(fake_chat_completion, step_log):
+    """Test that docs the proofreader never approves are given up on instead of rewritten forever."""
+    from part2 import _MAX_CYCLES_PER_DOC, run_many
+
+    fake_chat_completion["approve_after"] = 99
+
+    (run,) = await run_many(["Contoso GlowBrew"])
+
+    assert not run.published and run.error is None
+    assert "Publishing product documentation" not in step_log.text
+    assert fake_chat_completion["generate"] == 1 + _MAX_CYCLES_PER_DOC
+
+
+@pytest.mark.asyncio
+async def test_part2_does_not_publish_unreadable_verdicts(
+    fake_chat_completion, step_log
+):
+    """Test that docs are not published when the proofreading response can't be parsed."""
+    from part2 import _MAX_CYCLES_PER_DOC, main
+
+    fake_chat_completion["approve_after"] = 0
+    fake_chat_completion["truncate"] = True
+
+    await main()
+
+    assert "Publishing product documentation" not in step_log.text
+    assert fake_chat_completion["generate"] == 1 + _MAX_CYCLES_PER_DOC
+
+
+@pytest.mark.asyncio
+async def test_part2_runs_many_products(fake_chat_completion):
+    """Test that every product of a concurrent run is published, each from its own conversation."""
+    from part2 import run_many
+
+    fake_chat_completion["approve_after"] = 0
+    products = ["Contoso GlowBrew", "Contoso GlowBrew Mini", "Contoso GlowBrew Pro"]
+
+    runs = await run_many(products, max_concurrency=2)
+
+    assert [run.product for run in runs] == products
+    assert all(run.published and run.error is None for run in runs)
+    # The products get the same product information, so unless their histories leak into each other
+    # they send identical conversations and share a single generated draft
+    assert all("draft 1" in run.docs for run in runs)
+    assert fake_chat_completion["generate"] == 1
+
+
+@pytest.mark.asyncio
+async def test_part2_reports_failed_runs(fake_chat_completion):
+    """Test that a run whose chat call raises reports the error instead of looking given up on."""
+    from part2 import run_many
+
+    fake_chat_completion["fail"] = True
+
+    (run,) = await run_many(["Contoso GlowBrew"])
+
+    assert not run.published
+    assert "generate_documentation" in run.error
+
+
+@pytest.mark.asyncio
+async def test_run_many_limits_concurrent_rewrites(fake_chat_completion, monkeypatch):
+    """Test that the rewrite limit passed to run_many reaches the rewrites of its runs, and only those."""
+    import part2
+
+    slots_free = []
+    generate = part2._generate
+
+    async def spy(chat_history):
+        semaphore = part2._REWRITE_SEMAPHORE.get()
+        slots_free.append(None if semaphore is None else not semaphore.locked())
+        return await generate(chat_history)
+
+    monkeypatch.setattr(part2, "_generate", spy)
+
+    (run,) = await part2.run_many(["Contoso GlowBrew"], max_concurrent_rewrites=1)
+
+    assert run.published
+    # The first draft leaves the only rewrite slot free, the rewrite holds it
+    assert slots_free == [True, False]
+    assert part2._REWRITE_SEMAPHORE.get() is None
+
+
+# Long and clean enough to pass the proofreader's local checks
+DOCS = (
+    "GlowBrew is an AI driven coffee machine with programmable light shows, a built in grinder and an "
+    "AI taste assistant that learns your preferences. If the LEDs malfunction, reset the lighting "
+    "settings via the app."
+)
+
+
+class RecordingContext:
+    """Stands in for the step context when calling a step directly, records the emitted events."""
+
+    def __init__(self):
+        self.events = []
+
+    async def emit_event(self, process_event, data=None):
+        self.events.append(process_event)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "docs", ["GlowBrew makes coffee.", f"{DOCS} The light show is damn bright."]
+)
+async def test_prefilter_rejects_without_proofreader(fake_chat_completion, docs):
+    """Test that short or profane docs are rejected by the local checks, without an LLM call."""
+    from part2 import ProofreadStep
+
+    context = RecordingContext()
+
+    await ProofreadStep().proofread_documentation(docs, context, kernel=None)
+
+    assert context.events == ["documentation_rejected"]
+    assert fake_chat_completion["proofread"] == 0
+
+
+@pytest.mark.asyncio
+async def test_approved_docs_are_not_proofread_again(fake_chat_completion):
+    """Test that docs the proofreader approved before are approved again without an LLM call."""
+    from part2 import ProofreadStep
+
+    fake_chat_completion["approve_after"] = 0
+    context = RecordingContext()
+
+    for _ in range(2):
+        await ProofreadStep().proofread_documentation(DOCS, context, kernel=None)
+
+    assert context.events == ["documentation_approved"] * 2
+    assert fake_chat_completion["proofread"] == 1
+
+
+def test_trim_history_keeps_latest_draft():
+    """Test that trimming drops older turns but never the draft being rewritten or the request for it."""
+    from semantic_kernel.contents import ChatHistory
+
+    from part2 import _OMITTED_NOTE, GenerateDocumentationStep
+
+    step = GenerateDocumentationStep()
+    history = ChatHistory(system_message=step.system_prompt)
+    history.add_user_message("Product Information:\nGlowBrew")
+    for turn in range(6):
+        history.add_user_message(f"Suggestions {turn}")
+    history.add_assistant_message("x" * GenerateDocumentationStep.max_chars)
+    history.add_user_message("Latest suggestions")
+    step.state.chat_history = history
+
+    step._trim_history()
+
+    contents = [message.content for message in history.messages]
+    assert contents[2] == _OMITTED_NOTE
+    assert contents[-2:] == [
+        "x" * GenerateDocumentationStep.max_chars,
+        "Latest suggestions",
+    ]
+    assert "Suggestions 0" not in contents